@@ -1,25 +1,91 @@
 import RPi.GPIO as GPIO
+import atexit
 import logging
+import threading
 from typing import Optional
 
+# pigpio drives ENA/ENB from the BCM hardware PWM when its daemon is running
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
+
 logger = logging.getLogger(__name__)
 
+# Motor pins (BCM numbering)
+ENA_PIN = 18  # Left motor PWM
+ENB_PIN = 13  # Right motor PWM
+IN1_PIN = 23  # Left motor direction 1
+IN2_PIN = 24  # Left motor direction 2
+IN3_PIN = 27  # Right motor direction 1
+IN4_PIN = 22  # Right motor direction 2
+
+PWM_FREQUENCY = 1000  # Hz
+
+# All motor pins, configured together in one call
+MOTOR_PINS = [ENA_PIN, ENB_PIN, IN1_PIN, IN2_PIN, IN3_PIN, IN4_PIN]
+
+# Direction pins of both motors, written together in one call
+DIRECTION_PINS = [IN1_PIN, IN2_PIN, IN3_PIN, IN4_PIN]
+
+# Direction pin levels for a motor, keyed by direction
+DIRECTION_LEVELS = {
+    1: (GPIO.HIGH, GPIO.LOW),   # Clockwise
+    -1: (GPIO.LOW, GPIO.HIGH),  # Anticlockwise
+    0: (GPIO.LOW, GPIO.LOW),    # Stop
+}
+
+def _direction(speed: Optional[float]) -> Optional[int]:
+    """Direction of a motor speed: 1, -1 or 0 (None if unknown)"""
+    if speed is None:
+        return None
+    return (speed > 0) - (speed < 0)
+
+def _stop_hardware_pwm(pi):
+    """Zero both motors' hardware PWM (process exit hook)"""
+    try:
+        if pi.connected:
+            pi.hardware_PWM(ENA_PIN, 0, 0)
+            pi.hardware_PWM(ENB_PIN, 0, 0)
+    except Exception as e:
+        logger.error("Error stopping hardware PWM at exit: %s", e)
+
 class TankCar:
     """Simple tank drive car controller"""
     
+    # Fixed attribute layout: no per-instance dict on the motor hot path
+    __slots__ = (
+        "ENA", "ENB", "IN1", "IN2", "IN3", "IN4",
+        "left_pwm", "right_pwm", "pi",
+        "_left_speed", "_right_speed", "_left_duty", "_right_duty",
+        "_lock",
+    )
+    
     def __init__(self):
         # Motor pins
-        self.ENA = 18  # Left motor PWM
-        self.ENB = 13  # Right motor PWM
-        self.IN1 = 23  # Left motor direction 1
-        self.IN2 = 24  # Left motor direction 2
-        self.IN3 = 27  # Right motor direction 1
-        self.IN4 = 22  # Right motor direction 2
+        self.ENA = ENA_PIN
+        self.ENB = ENB_PIN
+        self.IN1 = IN1_PIN
+        self.IN2 = IN2_PIN
+        self.IN3 = IN3_PIN
+        self.IN4 = IN4_PIN
         
-        # PWM instances
+        # PWM instances (software PWM, only used without pigpio)
         self.left_pwm: Optional[GPIO.PWM] = None
         self.right_pwm: Optional[GPIO.PWM] = None
         
+        # pigpio connection for hardware PWM
+        self.pi = None
+        
+        # Last speeds written to each motor, used to skip redundant writes
+        self._left_speed: Optional[float] = None
+        self._right_speed: Optional[float] = None
+        self._left_duty: Optional[float] = None
+        self._right_duty: Optional[float] = None
+        
+        # Guards GPIO writes and the cached motor state above
+        self._lock = threading.Lock()
+        
         # Initialize GPIO
         self._setup_gpio()
     
@@ -29,60 +95,78 @@ class TankCar:
             GPIO.setmode(GPIO.BCM)
             GPIO.setwarnings(False)
             
-            # Setup motor pins as outputs
-            for pin in [self.ENA, self.ENB, self.IN1, self.IN2, self.IN3, self.IN4]:
-                GPIO.setup(pin, GPIO.OUT)
-                GPIO.output(pin, GPIO.LOW)
+            # Setup motor pins as low outputs in one call
+            GPIO.setup(MOTOR_PINS, GPIO.OUT, initial=GPIO.LOW)
             
-            # Initialize PWM (1kHz frequency)
-            self.left_pwm = GPIO.PWM(self.ENA, 1000)
-            self.right_pwm = GPIO.PWM(self.ENB, 1000)
-            self.left_pwm.start(0)
-            self.right_pwm.start(0)
+            # Initialize PWM (1kHz frequency), in hardware when possible
+            self.pi = self._connect_pigpio()
+            if self.pi:
+                self.pi.hardware_PWM(ENA_PIN, PWM_FREQUENCY, 0)
+                self.pi.hardware_PWM(ENB_PIN, PWM_FREQUENCY, 0)
+                logger.info("Using hardware PWM for motors")
+            else:
+                self.left_pwm = GPIO.PWM(self.ENA, PWM_FREQUENCY)
+                self.right_pwm = GPIO.PWM(self.ENB, PWM_FREQUENCY)
+                self.left_pwm.start(0)
+                self.right_pwm.start(0)
+            self._left_speed = 0
+            self._right_speed = 0
+            self._left_duty = 0
+            self._right_duty = 0
             
             logger.info("Car GPIO initialized successfully")
             
         except Exception as e:
-            logger.error(f"Failed to initialize car GPIO: {e}")
+            logger.error("Failed to initialize car GPIO: %s", e)
             raise
     
+    def _connect_pigpio(self):
+        """Connect to the pigpio daemon, or return None to use software PWM"""
+        if pigpio is None:
+            return None
+        pi = pigpio.pi()
+        if not pi.connected:
+            logger.warning("pigpio daemon not running, using software PWM")
+            return None
+        # pigpiod keeps driving the PWM after we exit; stop the motors even
+        # if cleanup() never runs (crash, forced quit)
+        atexit.register(_stop_hardware_pwm, pi)
+        return pi
+    
+    def _set_duty(self, pin: int, pwm: Optional[GPIO.PWM], duty: float):
+        """Set a motor enable pin's duty cycle (0 to 100)"""
+        pi = self.pi
+        if pi:
+            # pigpio takes the duty cycle in millionths
+            pi.hardware_PWM(pin, PWM_FREQUENCY, int(duty * 10000))
+        elif pwm:
+            pwm.ChangeDutyCycle(duty)
+    
+    def _set_directions(self, left_speed: float, right_speed: float):
+        """Set direction pins of both motors in one GPIO call"""
+        left = _direction(left_speed)
+        right = _direction(right_speed)
+        # Direction pins only change when a direction does
+        if left != _direction(self._left_speed) or right != _direction(self._right_speed):
+            GPIO.output(DIRECTION_PINS, DIRECTION_LEVELS[left] + DIRECTION_LEVELS[right])
+    
     def _set_left_motor(self, speed: float):
-        """Control left motor (-100 to 100)"""
-        if speed > 0:
-            # Clockwise
-            GPIO.output(self.IN1, GPIO.HIGH)
-            GPIO.output(self.IN2, GPIO.LOW)
-        elif speed < 0:
-            # Anticlockwise
-            GPIO.output(self.IN1, GPIO.LOW)
-            GPIO.output(self.IN2, GPIO.HIGH)
-        else:
-            # Stop
-            GPIO.output(self.IN1, GPIO.LOW)
-            GPIO.output(self.IN2, GPIO.LOW)
-        
-        # Set PWM speed
-        if self.left_pwm:
-            self.left_pwm.ChangeDutyCycle(abs(speed))
+        """Set left motor PWM speed (-100 to 100)"""
+        duty = abs(speed)
+        # Reuse the running PWM rather than restarting it
+        if duty != self._left_duty:
+            self._set_duty(ENA_PIN, self.left_pwm, duty)
+            self._left_duty = duty
+        self._left_speed = speed
     
     def _set_right_motor(self, speed: float):
-        """Control right motor (-100 to 100)"""
-        if speed > 0:
-            # Clockwise
-            GPIO.output(self.IN3, GPIO.HIGH)
-            GPIO.output(self.IN4, GPIO.LOW)
-        elif speed < 0:
-            # Anticlockwise
-            GPIO.output(self.IN3, GPIO.LOW)
-            GPIO.output(self.IN4, GPIO.HIGH)
-        else:
-            # Stop
-            GPIO.output(self.IN3, GPIO.LOW)
-            GPIO.output(self.IN4, GPIO.LOW)
-        
-        # Set PWM speed
-        if self.right_pwm:
-            self.right_pwm.ChangeDutyCycle(abs(speed))
+        """Set right motor PWM speed (-100 to 100)"""
+        duty = abs(speed)
+        # Reuse the running PWM rather than restarting it
+        if duty != self._right_duty:
+            self._set_duty(ENB_PIN, self.right_pwm, duty)
+            self._right_duty = duty
+        self._right_speed = speed
     
     def move(self, left_speed: float, right_speed: float):
         """Move car with individual motor speeds (-100 to 100)"""
@@ -90,10 +174,12 @@ class TankCar:
         left_speed = max(-100, min(100, left_speed))
         right_speed = max(-100, min(100, right_speed))
         
-        self._set_left_motor(left_speed)
-        self._set_right_motor(right_speed)
+        with self._lock:
+            self._set_directions(left_speed, right_speed)
+            self._set_left_motor(left_speed)
+            self._set_right_motor(right_speed)
         
-        logger.info(f"Car moving: left={left_speed}%, right={right_speed}%")
+        logger.debug("Car moving: left=%s%%, right=%s%%", left_speed, right_speed)
     
     def forward(self, speed: float = 50):
         """Move forward (both sides clockwise)"""
@@ -126,11 +212,22 @@ class TankCar:
     def cleanup(self):
         """Clean up GPIO resources"""
         try:
-            if self.left_pwm:
-                self.left_pwm.stop()
-            if self.right_pwm:
-                self.right_pwm.stop()
-            GPIO.cleanup()
+            with self._lock:
+                self._left_speed = None
+                self._right_speed = None
+                self._left_duty = None
+                self._right_duty = None
+                if self.left_pwm:
+                    self.left_pwm.stop()
+                if self.right_pwm:
+                    self.right_pwm.stop()
+                if self.pi:
+                    self.pi.hardware_PWM(ENA_PIN, 0, 0)
+                    self.pi.hardware_PWM(ENB_PIN, 0, 0)
+                    self.pi.stop()
+                    self.pi = None
+                    atexit.unregister(_stop_hardware_pwm)
+                GPIO.cleanup()
             logger.info("Car GPIO cleaned up")
         except Exception as e:
-            logger.error(f"Error during car cleanup: {e}")
\ No newline at end of file
+            logger.error("Error during car cleanup: %s", e)
\ No newline at end of file
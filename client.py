@@ -138,8 +138,8 @@ class TankCarClient:
             # Run YOLO detection
             results = self.model(frame, verbose=False)
             
-            # Draw detections
-            annotated_frame = frame.copy()
+            # Draw detections (copy the frame only once there is something to draw)
+            annotated_frame = frame
             self.detections = []
             
             for r in results:
@@ -160,6 +160,9 @@ class TankCarClient:
                         }
                         self.detections.append(detection)
                         
+                        if annotated_frame is frame:
+                            annotated_frame = frame.copy()
+                        
                         # Draw bounding box (highlight target objects in red)
                         color = (0, 0, 255) if class_name in self.target_objects else (0, 255, 0)
                         cv2.rectangle(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
@@ -291,7 +294,7 @@ class TankCarClient:
             response_data = json.loads(response)
             
             if response_data.get("status") == "ok":
-                logger.info(f"Command executed: {command}")
+                logger.debug("Command executed: %s", command)
                 return True
             else:
                 logger.warning(f"Command failed: {response_data}")
@@ -313,8 +316,9 @@ class TankCarClient:
             async for message in websocket:
                 try:
                     data = json.loads(message)
+                    msg_type = data.get("type")
                     
-                    if data.get("type") == "control":
+                    if msg_type == "control":
                         command = data.get("command")
                         params = data.get("params", {})
                         
@@ -329,7 +333,7 @@ class TankCarClient:
                         }
                         await websocket.send(json.dumps(response))
                     
-                    elif data.get("type") == "toggle_detection":
+                    elif msg_type == "toggle_detection":
                         self.detection_enabled = data.get("enabled", True)
                         logger.info(f"Object detection {'enabled' if self.detection_enabled else 'disabled'}")
                         
@@ -339,7 +343,7 @@ class TankCarClient:
                         }
                         await websocket.send(json.dumps(response))
                     
-                    elif data.get("type") == "set_target_objects":
+                    elif msg_type == "set_target_objects":
                         # New endpoint for setting target objects
                         objects_string = data.get("objects", "")
                         self.target_objects = set()
@@ -357,7 +361,7 @@ class TankCarClient:
                         }
                         await websocket.send(json.dumps(response))
                     
-                    elif data.get("type") == "toggle_auto_movement":
+                    elif msg_type == "toggle_auto_movement":
                         # Toggle auto-movement feature
                         self.auto_movement_enabled = data.get("enabled", True)
                         logger.info(f"Auto-movement {'enabled' if self.auto_movement_enabled else 'disabled'}")
@@ -368,7 +372,7 @@ class TankCarClient:
                         }
                         await websocket.send(json.dumps(response))
                     
-                    elif data.get("type") == "get_status":
+                    elif msg_type == "get_status":
                         # Get current status
                         response = {
                             "type": "status",
@@ -432,19 +436,19 @@ class TankCarClient:
                             line_str = line.decode().strip()
                             line_count += 1
                             
-                            if line_count % 30 == 0:  # Log every second
-                                logger.info(f"IR stream: received {line_count} lines")
+                            if line_count % 30 == 0:  # Log every 30 lines
+                                logger.info("IR stream: received %d lines", line_count)
                             
                             if line_str.startswith("data:"):
                                 try:
                                     value = line_str.split("data:")[1].strip()
                                     self.ir_value = value
-                                    logger.debug(f"IR value: {value}")
+                                    logger.debug("IR value: %s", value)
                                     await self.broadcast_ir_value(value)
                                 except (IndexError, ValueError) as e:
-                                    logger.warning(f"Invalid IR data format: {line_str}")
+                                    logger.warning("Invalid IR data format: %s", line_str)
                             elif line_str:
-                                logger.debug(f"Non-data line: {line_str}")
+                                logger.debug("Non-data line: %s", line_str)
                                     
             except asyncio.CancelledError:
                 logger.info("IR stream task cancelled")
@@ -1,88 +1,208 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
 import logging
 import cv2
 import asyncio
+import os
 from concurrent.futures import ThreadPoolExecutor
 from car import TankCar
+from realtime import init_realtime_thread
 import time
-from starlette.responses import StreamingResponse
+from starlette.responses import Response, StreamingResponse
 from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Optional
+import atexit
+import json
+import queue
+import struct
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Setup logging - records are written to stderr on a background thread
+# so handler I/O never blocks the event loop. uvicorn's own loggers
+# (including the per-request access log) propagate here too, see
+# log_config=None below.
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
+logger = logging.getLogger(__name__)
 
 # Try to import ir module, handle if it doesn't exist
 try:
-    from ir import ir_stream
+    from ir import ir_stream_async
     IR_AVAILABLE = True
 except ImportError:
     IR_AVAILABLE = False
     logging.warning("IR module not available")
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Use libjpeg-turbo's SIMD encoder when PyTurboJPEG is installed
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420, TJFLAG_FASTDCT
+    turbo_jpeg = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    turbo_jpeg = None
+    logging.info("PyTurboJPEG not available, using OpenCV JPEG encoder")
+
+# Use orjson's C codec for JSON responses and WebSocket messages when installed
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:
+    orjson = None
+    logging.info("orjson not available, using stdlib json")
+
+if orjson is not None:
+    json_loads = orjson.loads
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
 
 # Global variables
 car: TankCar = None
 global_camera = None
-camera_lock = asyncio.Lock()
-executor = ThreadPoolExecutor(max_workers=4)
+camera_executor: ThreadPoolExecutor = None  # Created per app lifespan
+# Optional GStreamer pipeline delivering JPEG frames straight from the
+# camera/ISP, passed through without re-encoding, e.g.
+# v4l2src device=/dev/video0 ! image/jpeg,width=640,height=480,framerate=30/1 ! appsink drop=true max-buffers=1
+CAMERA_PIPELINE = os.environ.get("CAMERA_PIPELINE")
+camera_frames = queue.Queue(maxsize=1)  # Latest raw frame from the grabber thread
+camera_frame_ready: asyncio.Event = None  # Set by the grabber thread for each frame; created per app lifespan
+camera_stop = threading.Event()
+camera_wanted = threading.Event()  # Set while the camera hub has subscribers
+camera_thread: threading.Thread = None
+
+# GPIO worker scheduling. For the lowest jitter, keep other tasks off this
+# core by adding isolcpus=3 to the kernel cmdline (/boot/cmdline.txt).
+GPIO_CPU = 3
+GPIO_RT_PRIORITY = 20
+
+def init_gpio_thread():
+    """Pin the GPIO worker to its core and give it a real-time policy"""
+    init_realtime_thread(GPIO_CPU, GPIO_RT_PRIORITY, "GPIO thread")
+
+# Single worker keeps GPIO off the event loop and serializes hardware access
+gpio_executor: ThreadPoolExecutor = None  # Created per app lifespan
+
+async def run_gpio(fn, *args):
+    """Run a blocking GPIO call on the dedicated GPIO thread"""
+    return await asyncio.get_running_loop().run_in_executor(gpio_executor, fn, *args)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan - startup and shutdown"""
-    global car, global_camera
+    global car, global_camera, camera_executor, gpio_executor, camera_frame_ready, camera_thread
     
     # Startup
+    camera_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="camera")
+    # Bound to this lifespan's event loop
+    camera_frame_ready = asyncio.Event()
+    gpio_executor = ThreadPoolExecutor(
+        max_workers=1,
+        thread_name_prefix="gpio",
+        initializer=init_gpio_thread
+    )
+    
     try:
         # Initialize car
         car = TankCar()
         logger.info("Tank car initialized")
         
         # Initialize camera
-        global_camera = cv2.VideoCapture(0)
+        if CAMERA_PIPELINE:
+            # The pipeline fixes the format, size and rate itself
+            global_camera = cv2.VideoCapture(CAMERA_PIPELINE, cv2.CAP_GSTREAMER)
+        else:
+            # V4L2 explicitly: it is the backend that can hand over raw
+            # MJPEG buffers (CONVERT_RGB=0)
+            global_camera = cv2.VideoCapture(0, cv2.CAP_V4L2)
+            if global_camera.isOpened():
+                # Request MJPEG so the camera delivers compressed frames
+                global_camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+                global_camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+                global_camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                global_camera.set(cv2.CAP_PROP_FPS, 30)
+                global_camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                # Raw buffers are only JPEGs if the camera accepted MJPG;
+                # otherwise (YUYV, NV12, ...) OpenCV must convert to BGR
+                fourcc = int(global_camera.get(cv2.CAP_PROP_FOURCC))
+                fourcc = "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4))
+                if fourcc == "MJPG":
+                    # Disable conversion so frames come through undecoded
+                    global_camera.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+                    logger.info("Camera delivers MJPEG, passing frames through")
+                else:
+                    global_camera.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+                    logger.info("Camera delivers %r, converting frames to BGR and encoding", fourcc)
         if global_camera.isOpened():
-            global_camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            global_camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            global_camera.set(cv2.CAP_PROP_FPS, 30)
-            global_camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             logger.info("Camera initialized successfully")
+            
+            # Read frames on a dedicated thread, independent of clients
+            camera_stop.clear()
+            camera_thread = threading.Thread(
+                target=grab_frames,
+                args=(asyncio.get_running_loop(), camera_frame_ready),
+                name="camera-grabber",
+                daemon=True
+            )
+            camera_thread.start()
         else:
             logger.warning("Camera initialization failed")
             global_camera = None
             
     except Exception as e:
-        logger.error(f"Failed to initialize resources: {e}")
+        logger.error("Failed to initialize resources: %s", e)
         # Don't raise here, let the app start but with limited functionality
     
     yield
     
     # Shutdown
+    camera_hub.stop()
+    
+    camera_stop.set()
+    if camera_thread:
+        camera_thread.join(timeout=1.0)
+    
     try:
         if car:
-            car.stop()  # Stop car before cleanup
-            car.cleanup()
+            await run_gpio(car.stop)  # Stop car before cleanup
+            await run_gpio(car.cleanup)
             logger.info("Car cleaned up")
     except Exception as e:
-        logger.error(f"Error cleaning up car: {e}")
+        logger.error("Error cleaning up car: %s", e)
     
     try:
-        if global_camera:
-            global_camera.release()
-            logger.info("Camera released")
+        gpio_executor.shutdown(wait=True)
+        logger.info("GPIO executor shutdown")
     except Exception as e:
-        logger.error(f"Error releasing camera: {e}")
+        logger.error("Error shutting down GPIO executor: %s", e)
     
     try:
-        executor.shutdown(wait=True)
-        logger.info("Executor shutdown")
+        # Drop queued encodes; only in-flight work is waited for
+        camera_executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("Camera executor shutdown")
     except Exception as e:
-        logger.error(f"Error shutting down executor: {e}")
+        logger.error("Error shutting down camera executor: %s", e)
+    
+    try:
+        if global_camera:
+            global_camera.release()
+            logger.info("Camera released")
+    except Exception as e:
+        logger.error("Error releasing camera: %s", e)
 
 app = FastAPI(
     title="Tank Car Controller", 
     description="Simple tank drive car control system", 
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
 # CORS middleware
@@ -94,26 +214,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Streaming responses sent uncompressed: JPEGs don't shrink, and gzip
+# would buffer the IR events
+UNCOMPRESSED_PATHS = {"/camera/mjpeg", "/ir/stream"}
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip HTTP responses except those on UNCOMPRESSED_PATHS"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=500)
+
 # Pydantic models
 class TankDriveCommand(BaseModel):
     left_speed: float = Field(..., ge=-100, le=100, description="Left motor speed (-100 to 100)")
     right_speed: float = Field(..., ge=-100, le=100, description="Right motor speed (-100 to 100)")
 
 class DirectionalCommand(BaseModel):
+    # Frozen so the shared default below can't be modified
+    model_config = ConfigDict(frozen=True)
+    
     speed: float = Field(50, ge=0, le=100, description="Motor speed (0-100%)")
 
+# Used by directional commands posted without a body
+DEFAULT_DIRECTIONAL_COMMAND = DirectionalCommand()
+
+# Validators for commands that arrive outside FastAPI request binding
+DIRECTIONAL_COMMAND_ADAPTER = TypeAdapter(DirectionalCommand)
+TANK_DRIVE_COMMAND_ADAPTER = TypeAdapter(TankDriveCommand)
+
+# Pre-serialized bodies for constant responses
+CAMERA_AVAILABLE_JSON = json.dumps({"status": "available", "message": "Camera is ready"}).encode()
+CAMERA_UNAVAILABLE_JSON = json.dumps({"status": "unavailable", "message": "Camera not available"}).encode()
+
 # Helper function to check if car is available
 def check_car_available():
     if car is None:
         raise HTTPException(status_code=503, detail="Car not initialized")
 
+async def send_json(websocket: WebSocket, data):
+    """Send a JSON text message, encoded with json_dumps"""
+    await websocket.send_text(json_dumps(data))
+
+async def receive_json(websocket: WebSocket):
+    """Receive a JSON text message, decoded with json_loads"""
+    return json_loads(await websocket.receive_text())
+
+def is_motor_speed(value) -> bool:
+    """Check that a value is a valid motor speed (-100 to 100)"""
+    return isinstance(value, (int, float)) and -100 <= value <= 100
+
 # Car control endpoints
 @app.post("/car/move")
 async def move_car(command: TankDriveCommand):
     """Control both motors independently (tank drive)"""
     try:
         check_car_available()
-        car.move(command.left_speed, command.right_speed)
+        await run_gpio(car.move, command.left_speed, command.right_speed)
         return {
             "message": "Car move command executed", 
             "left_speed": command.left_speed, 
@@ -122,200 +283,425 @@ async def move_car(command: TankDriveCommand):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error moving car: {e}")
+        logger.error("Error moving car: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/car/forward")
-async def move_forward(command: DirectionalCommand = DirectionalCommand()):
-    """Move forward at specified speed"""
+@app.post("/car/stop")
+async def stop_car():
+    """Stop the car"""
     try:
         check_car_available()
-        car.forward(command.speed)
-        return {"message": f"Moving forward at {command.speed}% speed"}
+        await run_gpio(car.stop)
+        return {"message": "Car stopped"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error moving forward: {e}")
+        logger.error("Error stopping car: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/car/backward")
-async def move_backward(command: DirectionalCommand = DirectionalCommand()):
-    """Move backward at specified speed"""
-    try:
-        check_car_available()
-        car.backward(command.speed)
-        return {"message": f"Moving backward at {command.speed}% speed"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error moving backward: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+# Directional commands: path segment -> (TankCar method, response message)
+DIRECTIONS = {
+    "forward": (TankCar.forward, "Moving forward"),
+    "backward": (TankCar.backward, "Moving backward"),
+    "left": (TankCar.turn_left, "Turning left"),
+    "right": (TankCar.turn_right, "Turning right"),
+    "pivot-left": (TankCar.pivot_left, "Pivoting left"),
+    "pivot-right": (TankCar.pivot_right, "Pivoting right"),
+}
 
-@app.post("/car/left")
-async def turn_left(command: DirectionalCommand = DirectionalCommand()):
-    """Turn left (spin in place)"""
-    try:
-        check_car_available()
-        car.turn_left(command.speed)
-        return {"message": f"Turning left at {command.speed}% speed"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error turning left: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+# Valid path segments, validated and documented by FastAPI
+Direction = Enum("Direction", {name.replace("-", "_"): name for name in DIRECTIONS}, type=str)
 
-@app.post("/car/right")
-async def turn_right(command: DirectionalCommand = DirectionalCommand()):
-    """Turn right (spin in place)"""
+@app.post("/car/{direction}")
+async def move_direction(direction: Direction, command: Optional[DirectionalCommand] = None):
+    """Move in a direction (forward, backward, left, right, pivot-left, pivot-right)"""
+    action, message = DIRECTIONS[direction.value]
+    command = command or DEFAULT_DIRECTIONAL_COMMAND
     try:
         check_car_available()
-        car.turn_right(command.speed)
-        return {"message": f"Turning right at {command.speed}% speed"}
+        await run_gpio(action, car, command.speed)
+        return {"message": f"{message} at {command.speed}% speed"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error turning right: {e}")
+        logger.error("Error executing %s: %s", direction.value, e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/car/pivot-left")
-async def pivot_left(command: DirectionalCommand = DirectionalCommand()):
-    """Pivot left (only right motor moves)"""
-    try:
-        check_car_available()
-        car.pivot_left(command.speed)
-        return {"message": f"Pivoting left at {command.speed}% speed"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error pivoting left: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+# Camera functions
+# Stream profile: (width, height, JPEG quality). Width/height of None keep
+# the captured size. Quality 70 is typically about half the size of 85
+# with little visible loss.
+DEFAULT_JPEG_QUALITY = 70
+# Stream defaults, e.g. STREAM_WIDTH=480 STREAM_HEIGHT=360 to send about
+# half the pixels. Unset keeps the captured size (and MJPEG passthrough,
+# whatever STREAM_QUALITY is).
+STREAM_WIDTH = int(os.environ.get("STREAM_WIDTH", 0)) or None
+STREAM_HEIGHT = int(os.environ.get("STREAM_HEIGHT", 0)) or None
+STREAM_QUALITY = int(os.environ.get("STREAM_QUALITY", DEFAULT_JPEG_QUALITY))
+DEFAULT_PROFILE = (STREAM_WIDTH, STREAM_HEIGHT, STREAM_QUALITY)
 
-@app.post("/car/pivot-right")
-async def pivot_right(command: DirectionalCommand = DirectionalCommand()):
-    """Pivot right (only left motor moves)"""
-    try:
-        check_car_available()
-        car.pivot_right(command.speed)
-        return {"message": f"Pivoting right at {command.speed}% speed"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error pivoting right: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+def stream_profile(params) -> tuple:
+    """Build a stream profile from width/height/quality query parameters"""
+    width = int(params["width"]) if params.get("width") else STREAM_WIDTH
+    height = int(params["height"]) if params.get("height") else STREAM_HEIGHT
+    quality = int(params["quality"]) if params.get("quality") else STREAM_QUALITY
+    if (width is not None and width <= 0) or (height is not None and height <= 0):
+        raise ValueError("width and height must be positive")
+    if not 1 <= quality <= 100:
+        raise ValueError("quality must be between 1 and 100")
+    return (width, height, quality)
 
-@app.post("/car/stop")
-async def stop_car():
-    """Stop the car"""
-    try:
-        check_car_available()
-        car.stop()
-        return {"message": "Car stopped"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error stopping car: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+def encode_jpeg(frame, quality: int):
+    """Encode a BGR frame as a JPEG bytes-like buffer"""
+    if turbo_jpeg:
+        return turbo_jpeg.encode(frame, quality=quality, jpeg_subsample=TJSAMP_420, flags=TJFLAG_FASTDCT)
+    _, jpeg = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    return jpeg.data  # Send the encoder's buffer without copying it
 
-# Camera functions
-async def capture_frame_async():
-    """Capture a frame from camera in thread pool"""
+def encode_frame(frame, profile: tuple):
+    """Encode a captured frame as a JPEG buffer for a stream profile
+    
+    Returns a bytes-like object that is never mutated afterwards (each
+    camera read allocates a new frame), so it can be sent without copying.
+    
+    A camera JPEG is passed through untouched for streams at the captured
+    size and the default STREAM_QUALITY: the camera's own compression
+    stands in for the default quality. Any other size or quality is
+    decoded and re-encoded.
+    """
+    width, height, quality = profile
+    
+    # MJPEG passthrough: a flat buffer is already an encoded JPEG
+    if frame.ndim == 1 or frame.shape[0] == 1:
+        if width is None and height is None and quality == STREAM_QUALITY:
+            return frame.reshape(-1).data
+        frame = cv2.imdecode(frame.reshape(-1), cv2.IMREAD_COLOR)
+        if frame is None:
+            return None
+    
+    # Downscale only; a missing dimension keeps the aspect ratio
+    if width or height:
+        frame_height, frame_width = frame.shape[:2]
+        width = width or round(frame_width * height / frame_height)
+        height = height or round(frame_height * width / frame_width)
+        if width < frame_width and height < frame_height:
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    
+    return encode_jpeg(frame, quality)
+
+def grab_frames(loop: asyncio.AbstractEventLoop, frame_ready: asyncio.Event):
+    """Continuously read camera frames while wanted, keeping only the latest.
+    
+    Runs on its own thread and sets frame_ready on the event loop for
+    every frame; a failed read is published as None. The camera is not
+    read while camera_wanted is clear (no one is watching).
+    """
+    while not camera_stop.is_set():
+        if not camera_wanted.wait(timeout=0.5):
+            continue
+        try:
+            ret, frame = global_camera.read()
+        except Exception as e:
+            logger.error("Camera read error: %s", e)
+            ret, frame = False, None
+        if not ret:
+            frame = None
+        
+        # Drop the stale frame; this thread is the only producer
+        try:
+            camera_frames.get_nowait()
+        except queue.Empty:
+            pass
+        camera_frames.put_nowait(frame)
+        loop.call_soon_threadsafe(frame_ready.set)
+        
+        if frame is None:
+            time.sleep(0.1)
+
+async def capture_frame_async(profiles):
+    """Wait for the next grabbed frame and encode it once per stream profile
+    
+    Returns a dict of profile -> JPEG buffer, or None if capture failed.
+    """
     if not global_camera or not global_camera.isOpened():
         return None
     
-    def _capture():
+    try:
+        await asyncio.wait_for(camera_frame_ready.wait(), timeout=1.0)
+    except asyncio.TimeoutError:
+        return None
+    camera_frame_ready.clear()
+    
+    try:
+        frame = camera_frames.get_nowait()
+    except queue.Empty:
+        return None
+    if frame is None:
+        return None
+    
+    def _encode():
         try:
-            ret, frame = global_camera.read()
-            if not ret or frame is None:
-                return None
-            # Use lower quality for faster encoding
-            _, jpeg = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-            return jpeg.tobytes()
+            return {profile: encode_frame(frame, profile) for profile in profiles}
         except Exception as e:
-            logger.error(f"Frame encoding error: {e}")
+            logger.error("Frame encoding error: %s", e)
             return None
     
     try:
-        return await asyncio.get_event_loop().run_in_executor(executor, _capture)
+        return await asyncio.get_running_loop().run_in_executor(camera_executor, _encode)
     except Exception as e:
-        logger.error(f"Frame capture async error: {e}")
+        logger.error("Frame capture async error: %s", e)
         return None
 
+MAX_CONSECUTIVE_CAMERA_ERRORS = 10
+FRAME_SEND_TIMEOUT = 0.5  # Close camera clients that cannot take a frame within this (seconds)
+
+def put_latest(frames: asyncio.Queue, item):
+    """Put an item into a single-slot queue, dropping the stale one"""
+    if frames.full():
+        frames.get_nowait()
+    frames.put_nowait(item)
+
+class CameraHub:
+    """Single camera producer that fans frames out to stream subscribers.
+    
+    Capture runs only while someone is subscribed: the hub sets
+    camera_wanted for the grabber thread, which otherwise doesn't read
+    the camera. Each subscriber gets a
+    single-slot queue of (sequence number, JPEG buffer). A frame is encoded
+    once per distinct stream profile and the same bytes object is shared
+    by every subscriber of that profile. None is queued and capture stops
+    after too many consecutive capture errors.
+    """
+    
+    def __init__(self):
+        self.subscribers = {}  # Subscriber queue -> stream profile
+        self.task = None
+    
+    def subscribe(self, profile: tuple = DEFAULT_PROFILE) -> asyncio.Queue:
+        """Register a subscriber, starting capture if needed"""
+        frames = asyncio.Queue(maxsize=1)
+        self.subscribers[frames] = profile
+        if self.task is None or self.task.done():
+            # Drop a frame left over from before capture was paused
+            try:
+                camera_frames.get_nowait()
+            except queue.Empty:
+                pass
+            if camera_frame_ready:
+                camera_frame_ready.clear()
+            camera_wanted.set()
+            self.task = asyncio.create_task(self._produce())
+        return frames
+    
+    def unsubscribe(self, frames: asyncio.Queue):
+        """Remove a subscriber, stopping capture when none are left"""
+        self.subscribers.pop(frames, None)
+        if not self.subscribers:
+            self.stop()
+    
+    def stop(self):
+        """Stop capturing"""
+        camera_wanted.clear()
+        if self.task:
+            self.task.cancel()
+            self.task = None
+    
+    def publish(self, item):
+        """Hand an item to every subscriber"""
+        for frames in self.subscribers:
+            put_latest(frames, item)
+    
+    async def _produce(self):
+        """Capture frames continuously and publish them"""
+        consecutive_errors = 0
+        seq = 0
+        while True:
+            # The hub is the only reader of the grabbed frames, so no lock is needed
+            encoded = await capture_frame_async(set(self.subscribers.values()))
+            
+            if encoded is None:
+                consecutive_errors += 1
+                if consecutive_errors >= MAX_CONSECUTIVE_CAMERA_ERRORS:
+                    self.publish(None)
+                    return
+                await asyncio.sleep(0.1)
+                continue
+            
+            consecutive_errors = 0  # Reset error counter
+            seq += 1
+            for frames, profile in self.subscribers.items():
+                frame_data = encoded.get(profile)
+                if frame_data is not None:
+                    put_latest(frames, (seq, frame_data))
+
+camera_hub = CameraHub()
+
 @app.websocket("/ws/camera")
 async def webcam_stream(websocket: WebSocket):
-    """WebSocket endpoint to stream webcam footage with minimal latency."""
+    """WebSocket endpoint to stream webcam footage with minimal latency.
+    
+    Frames come from the shared camera hub, so capture overlaps with
+    sending and costs the same regardless of how many clients watch.
+    A slow client skips frames rather than stalling capture, and is
+    disconnected if a single send takes longer than FRAME_SEND_TIMEOUT.
+    
+    Optional query parameters select a smaller stream, e.g.
+    /ws/camera?width=320&height=240&quality=60
+    """
     await websocket.accept()
+    frames = None
     
     try:
         if not global_camera or not global_camera.isOpened():
             await websocket.send_text("Camera not available")
             return
         
+        try:
+            profile = stream_profile(websocket.query_params)
+        except ValueError as e:
+            await websocket.send_text(f"Invalid stream parameters: {e}")
+            return
+        
         logger.info("Camera stream started")
         frame_count = 0
+        frames_dropped = 0
+        last_seq = None
         last_fps_time = time.time()
         consecutive_errors = 0
-        max_consecutive_errors = 10
+        frames = camera_hub.subscribe(profile)
         
         while True:
             try:
-                # Use camera lock to prevent conflicts
-                async with camera_lock:
-                    frame_data = await capture_frame_async()
-                
-                if frame_data is None:
-                    consecutive_errors += 1
-                    if consecutive_errors >= max_consecutive_errors:
-                        await websocket.send_text("Too many camera errors, stopping stream")
-                        break
-                    await asyncio.sleep(0.1)
-                    continue
+                item = await frames.get()
+                if item is None:
+                    await websocket.send_text("Too many camera errors, stopping stream")
+                    break
                 
-                consecutive_errors = 0  # Reset error counter
+                seq, frame_data = item
+                if last_seq is not None:
+                    frames_dropped += seq - last_seq - 1
+                last_seq = seq
                 
                 # Send frame
-                await websocket.send_bytes(frame_data)
+                try:
+                    await asyncio.wait_for(websocket.send_bytes(frame_data), timeout=FRAME_SEND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("Camera client too slow, closing stream")
+                    await websocket.close(code=1013)
+                    break
+                consecutive_errors = 0
                 
                 # FPS monitoring
                 frame_count += 1
                 if frame_count % 30 == 0:
                     current_time = time.time()
                     fps = 30 / (current_time - last_fps_time)
-                    logger.info(f"Camera FPS: {fps:.1f}")
+                    logger.info("Camera FPS: %.1f", fps)
                     last_fps_time = current_time
                 
-                # Control frame rate
-                await asyncio.sleep(0.033)  # ~30 FPS
-                
             except asyncio.CancelledError:
                 break
             except WebSocketDisconnect:
                 break
             except Exception as e:
-                logger.error(f"Frame streaming error: {e}")
+                logger.error("Frame streaming error: %s", e)
                 consecutive_errors += 1
-                if consecutive_errors >= max_consecutive_errors:
+                if consecutive_errors >= MAX_CONSECUTIVE_CAMERA_ERRORS:
                     break
                 await asyncio.sleep(0.1)
                 
     except WebSocketDisconnect:
         logger.info("Camera stream client disconnected")
     except Exception as e:
-        logger.error(f"Camera stream error: {e}")
+        logger.error("Camera stream error: %s", e)
         try:
             await websocket.send_text(f"Camera error: {str(e)}")
         except:
             pass
     finally:
-        logger.info("Camera stream ended")
+        if frames is not None:
+            camera_hub.unsubscribe(frames)
+            logger.info("Camera stream ended (%d frames sent, %d dropped)", frame_count, frames_dropped)
+        else:
+            logger.info("Camera stream ended")
+
+# Speed commands of the control WebSocket: command -> TankCar method
+CONTROL_COMMANDS = {
+    "forward": TankCar.forward,
+    "backward": TankCar.backward,
+    "left": TankCar.turn_left,
+    "right": TankCar.turn_right,
+    "pivot_left": TankCar.pivot_left,
+    "pivot_right": TankCar.pivot_right,
+}
+CONTROL_DEBOUNCE = 0.01  # Only the latest command within this window is applied (seconds)
+
+# Start of each part of the /camera/mjpeg multipart stream
+MJPEG_BOUNDARY = "frame"
+MJPEG_PART_HEADER = b"--" + MJPEG_BOUNDARY.encode() + b"\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+
+@app.get("/camera/mjpeg")
+async def camera_mjpeg(request: Request):
+    """Stream webcam footage as multipart MJPEG over plain HTTP.
+    
+    Browsers display it directly with <img src="/camera/mjpeg">. Frames
+    come from the shared camera hub and accept the same query parameters
+    as /ws/camera.
+    """
+    if not global_camera or not global_camera.isOpened():
+        raise HTTPException(status_code=503, detail="Camera not available")
+    
+    try:
+        profile = stream_profile(request.query_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid stream parameters: {e}")
+    
+    async def frame_stream():
+        frames = camera_hub.subscribe(profile)
+        logger.info("MJPEG stream started")
+        try:
+            while True:
+                item = await frames.get()
+                if item is None:
+                    break
+                _, frame_data = item
+                yield b"".join((MJPEG_PART_HEADER % len(frame_data), frame_data, b"\r\n"))
+        finally:
+            camera_hub.unsubscribe(frames)
+            logger.info("MJPEG stream ended")
+    
+    return StreamingResponse(
+        frame_stream(),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-cache"}
+    )
 
 @app.websocket("/ws/control")
 async def car_control_websocket(websocket: WebSocket):
-    """WebSocket for real-time car control commands"""
+    """WebSocket for real-time car control commands.
+    
+    Movement commands are debounced: the latest one received within
+    CONTROL_DEBOUNCE is applied, so bursts of joystick updates cost one
+    GPIO write. stop is always applied immediately.
+    """
     await websocket.accept()
+    pending = None  # Latest (function, *args) waiting to be applied
+    flush_task: asyncio.Task = None
+    
+    async def flush_pending():
+        nonlocal pending, flush_task
+        await asyncio.sleep(CONTROL_DEBOUNCE)
+        fn, *args = pending
+        pending = None
+        flush_task = None
+        try:
+            await run_gpio(fn, *args)
+        except Exception as e:
+            logger.error("Command execution error: %s", e)
     
     try:
         if car is None:
-            await websocket.send_json({"error": "Car not initialized"})
+            await send_json(websocket, {"error": "Car not initialized"})
             return
         
         logger.info("Car control WebSocket connected")
@@ -323,45 +709,49 @@ async def car_control_websocket(websocket: WebSocket):
         while True:
             try:
                 # Wait for command with timeout
-                data = await asyncio.wait_for(websocket.receive_json(), timeout=30.0)
+                data = await asyncio.wait_for(receive_json(websocket), timeout=30.0)
                 command = data.get("command")
-                speed = data.get("speed", 50)
                 
-                # Validate speed
-                if not isinstance(speed, (int, float)) or speed < 0 or speed > 100:
-                    await websocket.send_json({"error": "Invalid speed value"})
+                # Validate speed (strict: numbers only, as sent)
+                speed = data.get("speed", 50)
+                try:
+                    DIRECTIONAL_COMMAND_ADAPTER.validate_python({"speed": speed}, strict=True)
+                except ValidationError:
+                    await send_json(websocket, {"error": "Invalid speed value"})
                     continue
                 
-                # Execute command immediately
-                if command == "forward":
-                    car.forward(speed)
-                elif command == "backward":
-                    car.backward(speed)
-                elif command == "left":
-                    car.turn_left(speed)
-                elif command == "right":
-                    car.turn_right(speed)
-                elif command == "pivot_left":
-                    car.pivot_left(speed)
-                elif command == "pivot_right":
-                    car.pivot_right(speed)
-                elif command == "stop":
-                    car.stop()
-                elif command == "move":
-                    left_speed = data.get("left_speed", 0)
-                    right_speed = data.get("right_speed", 0)
-                    # Validate motor speeds
-                    if not all(isinstance(s, (int, float)) and -100 <= s <= 100 
-                              for s in [left_speed, right_speed]):
-                        await websocket.send_json({"error": "Invalid motor speed values"})
-                        continue
-                    car.move(left_speed, right_speed)
+                action = CONTROL_COMMANDS.get(command)
+                if command == "stop":
+                    # Stop immediately, dropping any pending command
+                    if flush_task is not None:
+                        flush_task.cancel()
+                        flush_task = None
+                    pending = None
+                    await run_gpio(car.stop)
                 else:
-                    await websocket.send_json({"error": f"Unknown command: {command}"})
-                    continue
+                    if action is not None:
+                        pending = (action, car, speed)
+                    elif command == "move":
+                        # Validate motor speeds
+                        left_speed = data.get("left_speed", 0)
+                        right_speed = data.get("right_speed", 0)
+                        try:
+                            TANK_DRIVE_COMMAND_ADAPTER.validate_python(
+                                {"left_speed": left_speed, "right_speed": right_speed}, strict=True
+                            )
+                        except ValidationError:
+                            await send_json(websocket, {"error": "Invalid motor speed values"})
+                            continue
+                        pending = (car.move, left_speed, right_speed)
+                    else:
+                        await send_json(websocket, {"error": f"Unknown command: {command}"})
+                        continue
+                    # Apply the latest command once the debounce window ends
+                    if flush_task is None:
+                        flush_task = asyncio.create_task(flush_pending())
                 
                 # Send confirmation
-                await websocket.send_json({
+                await send_json(websocket, {
                     "status": "ok", 
                     "command": command, 
                     "speed": speed,
@@ -370,22 +760,85 @@ async def car_control_websocket(websocket: WebSocket):
                 
             except asyncio.TimeoutError:
                 # Send heartbeat
-                await websocket.send_json({"status": "heartbeat"})
+                await send_json(websocket, {"status": "heartbeat"})
             except Exception as e:
-                logger.error(f"Command execution error: {e}")
-                await websocket.send_json({"error": str(e)})
+                logger.error("Command execution error: %s", e)
+                await send_json(websocket, {"error": str(e)})
                 
     except WebSocketDisconnect:
         logger.info("Car control WebSocket disconnected")
     except Exception as e:
-        logger.error(f"Car control WebSocket error: {e}")
+        logger.error("Car control WebSocket error: %s", e)
+    finally:
+        if flush_task is not None:
+            flush_task.cancel()
+        # Stop car when client disconnects for safety
+        try:
+            if car:
+                await run_gpio(car.stop)
+        except Exception as e:
+            logger.error("Error stopping car on disconnect: %s", e)
+
+# Binary tank drive command: left and right speed as little-endian float32
+TANK_COMMAND = struct.Struct("<ff")
+DEADMAN_TIMEOUT = 0.2  # Stop the car if no tank command arrives within this (seconds)
+
+@app.websocket("/ws/motor/tank")
+async def tank_drive_websocket(websocket: WebSocket):
+    """High-rate tank drive channel for joystick-style control.
+    
+    Each binary message carries two float32 motor speeds (-100 to 100)
+    packed as TANK_COMMAND. Commands are not acknowledged; errors are sent
+    back as JSON. The car stops when no command arrives for DEADMAN_TIMEOUT.
+    """
+    await websocket.accept()
+    
+    try:
+        if car is None:
+            await send_json(websocket, {"error": "Car not initialized"})
+            return
+        
+        logger.info("Tank drive WebSocket connected")
+        stopped = True
+        
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), timeout=DEADMAN_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Deadman: no fresh command, stop once
+                if not stopped:
+                    await run_gpio(car.stop)
+                    stopped = True
+                continue
+            
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
+            # A text frame is as malformed as a binary one of the wrong size
+            try:
+                left_speed, right_speed = TANK_COMMAND.unpack(message["bytes"])
+            except (KeyError, TypeError, struct.error):
+                await send_json(websocket, {"error": "Expected two float32 motor speeds"})
+                continue
+            
+            if not (is_motor_speed(left_speed) and is_motor_speed(right_speed)):
+                await send_json(websocket, {"error": "Invalid motor speed values"})
+                continue
+            
+            await run_gpio(car.move, left_speed, right_speed)
+            stopped = False
+                
+    except WebSocketDisconnect:
+        logger.info("Tank drive WebSocket disconnected")
+    except Exception as e:
+        logger.error("Tank drive WebSocket error: %s", e)
     finally:
         # Stop car when client disconnects for safety
         try:
             if car:
-                car.stop()
+                await run_gpio(car.stop)
         except Exception as e:
-            logger.error(f"Error stopping car on disconnect: {e}")
+            logger.error("Error stopping car on disconnect: %s", e)
 
 @app.get("/")
 async def root():
@@ -402,27 +855,30 @@ async def root():
 async def camera_status():
     """Check camera status"""
     if global_camera and global_camera.isOpened():
-        return {"status": "available", "message": "Camera is ready"}
+        return Response(CAMERA_AVAILABLE_JSON, media_type="application/json")
     else:
-        return {"status": "unavailable", "message": "Camera not available"}
+        return Response(CAMERA_UNAVAILABLE_JSON, media_type="application/json")
+
+# Pre-built server-sent events for each IR sensor value
+IR_SSE_EVENTS = {value: f"data: {value}\n\n".encode() for value in (0, 1, "error")}
 
 @app.get("/ir/stream")
 async def stream_ir():
-    """Stream IR sensor value at 30 FPS as server-sent events."""
+    """Stream IR sensor value as server-sent events, on change at up to 30 FPS."""
     if not IR_AVAILABLE:
         raise HTTPException(status_code=503, detail="IR sensor not available")
     
-    def event_stream():
+    async def event_stream():
         try:
             logger.info("Starting IR event stream")
             count = 0
-            for value in ir_stream(fps=30):
+            async for value in ir_stream_async(fps=30):
                 count += 1
-                if count % 30 == 0:  # Log every second
-                    logger.info(f"IR stream: sent {count} values, current: {value}")
-                yield f"data: {value}\n\n"
+                if count % 30 == 0:  # Log every 30 values
+                    logger.info("IR stream: sent %s values, current: %s", count, value)
+                yield IR_SSE_EVENTS[value]
         except Exception as e:
-            logger.error(f"IR stream error: {e}")
+            logger.error("IR stream error: %s", e)
             yield f"data: error:{str(e)}\n\n"
     
     return StreamingResponse(
@@ -435,10 +891,38 @@ async def stream_ir():
         }
     )
 
+# IR sample bytes for /ws/ir: the sensor value itself, or IR_ERROR_BYTE
+IR_ERROR_BYTE = 0xFF
+IR_SAMPLE_BYTES = {0: b"\x00", 1: b"\x01", "error": bytes([IR_ERROR_BYTE])}
+
+@app.websocket("/ws/ir")
+async def ir_websocket(websocket: WebSocket):
+    """Stream IR sensor value as binary WebSocket messages, on change at up to 30 FPS.
+    
+    Each message is a single byte: the sensor value (0 or 1), or
+    IR_ERROR_BYTE if the sensor could not be read. Far smaller than the
+    text events of /ir/stream, which is kept for existing clients.
+    """
+    await websocket.accept()
+    
+    try:
+        if not IR_AVAILABLE:
+            await send_json(websocket, {"error": "IR sensor not available"})
+            return
+        
+        logger.info("IR WebSocket connected")
+        async for value in ir_stream_async(fps=30):
+            await websocket.send_bytes(IR_SAMPLE_BYTES[value])
+            
+    except WebSocketDisconnect:
+        logger.info("IR WebSocket disconnected")
+    except Exception as e:
+        logger.error("IR WebSocket error: %s", e)
+
 # Add a simple test endpoint
 @app.get("/ir/test")
-async def test_ir():
-    """Test IR sensor directly"""
+def test_ir():
+    """Test IR sensor directly (sync, so the ~10s test runs in the threadpool)"""
     if not IR_AVAILABLE:
         raise HTTPException(status_code=503, detail="IR sensor not available")
     
@@ -447,9 +931,30 @@ async def test_ir():
         success = test_ir_sensor()
         return {"status": "success" if success else "failed", "message": "IR sensor test completed"}
     except Exception as e:
-        logger.error(f"IR test error: {e}")
+        logger.error("IR test error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        log_level="info",
+        # Keep uvicorn from installing its own synchronous handlers; its
+        # loggers propagate to the queued root handler instead
+        log_config=None,
+        # libuv event loop and C HTTP parser (pip install uvloop httptools)
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        # Keep command clients' connections open between POSTs
+        timeout_keep_alive=30,
+        limit_concurrency=1000,
+        # Camera frames are already JPEG; deflating them only costs CPU
+        ws_per_message_deflate=False,
+        # Endless streams (/camera/mjpeg, /ir/stream) are cancelled after
+        # this, so shutdown still stops the car and releases the camera
+        timeout_graceful_shutdown=5
+        # Single worker: the process owns the GPIO pins and the camera
+    )
\ No newline at end of file
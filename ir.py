@@ -1,50 +1,299 @@
 import RPi.GPIO as GPIO
+import array
+import asyncio
+import collections
+import functools
+import os
+import queue
+import threading
 import time
 import logging
+from realtime import init_realtime_thread
+
+# pigpio timestamps edges from its daemon's DMA sampling when available
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 GPIO.setmode(GPIO.BCM)
-IR_PIN = 17
+# BCM pin of the IR sensor, e.g. IR_PIN=5 for a sensor wired elsewhere
+# (must not be one of the motor pins in car.py)
+IR_PIN = int(os.environ.get("IR_PIN", 17))
 
 # Initialize IR pin
 GPIO.setup(IR_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
 
+# Scheduling of fixed-rate sampling threads: the isolated core of the
+# motor GPIO worker, at a lower real-time priority than motor commands
+IR_CPU = 3
+IR_RT_PRIORITY = 10
+
+# Streams repeat an unchanged value this often (seconds)
+IR_KEEPALIVE = 1.0
+
+# Callbacks of IR streams waiting for an edge, called on every edge
+_edge_listeners = set()
+_edge_detect = False
+
+def _on_ir_edge(channel):
+    """Notify every waiting IR stream (called on RPi.GPIO's event thread)"""
+    for notify in list(_edge_listeners):
+        try:
+            notify()
+        except RuntimeError:
+            pass  # Event loop already closed
+
+def _start_edge_detect():
+    """Enable edge detection on the IR pin, returning whether it is active"""
+    global _edge_detect
+    if not _edge_detect:
+        try:
+            GPIO.add_event_detect(IR_PIN, GPIO.BOTH, callback=_on_ir_edge, bouncetime=1)
+            _edge_detect = True
+        except RuntimeError as e:
+            logger.warning("IR edge detection unavailable, polling instead: %s", e)
+    return _edge_detect
+
+def _sleep_until(deadline):
+    """Sleep until a time.monotonic() deadline (no-op once it has passed)"""
+    delay = deadline - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+def _stop_edge_detect():
+    """Disable edge detection on the IR pin once no stream is waiting"""
+    global _edge_detect
+    if _edge_detect and not _edge_listeners:
+        GPIO.remove_event_detect(IR_PIN)
+        _edge_detect = False
+
 def ir_stream(fps=30):
-    """Generator that yields raw IR sensor value at specified FPS."""
+    """Generator that yields raw IR sensor value when it changes.
+    
+    Blocks until the pin's next edge, and repeats the current value every
+    IR_KEEPALIVE seconds while it doesn't change. Polls at fps if edge
+    detection is unavailable.
+    """
     interval = 1.0 / fps
-    logger.info(f"Starting IR stream at {fps} FPS (interval: {interval:.3f}s)")
+    edge_triggered = _start_edge_detect()
+    if edge_triggered:
+        logger.info("Starting IR stream (edge triggered)")
+    else:
+        logger.info("Starting IR stream (polling at %s FPS)", fps)
+    read = GPIO.input
+    edges = queue.SimpleQueue()
+    listener = functools.partial(edges.put, None)
+    if edge_triggered:
+        _edge_listeners.add(listener)
+    deadline = time.monotonic()
+    last = None
+    last_emit = 0.0
     
     try:
         while True:
             try:
-                value = GPIO.input(IR_PIN)
-                yield value
-                time.sleep(interval)
+                value = read(IR_PIN)
             except Exception as e:
-                logger.error(f"Error reading IR sensor: {e}")
-                yield "error"
-                time.sleep(interval)
+                logger.error("Error reading IR sensor: %s", e)
+                value = "error"
+            now = time.monotonic()
+            if value != last or now - last_emit >= IR_KEEPALIVE:
+                last = value
+                last_emit = now
+                yield value
+            if edge_triggered:
+                try:
+                    edges.get(timeout=max(0.0, last_emit + IR_KEEPALIVE - time.monotonic()))
+                except queue.Empty:
+                    continue  # Keepalive
+                # Edges queued meanwhile are covered by the next read
+                while not edges.empty():
+                    edges.get_nowait()
+            else:
+                # Fixed period, whatever time the consumer took
+                deadline += interval
+                _sleep_until(deadline)
     except GeneratorExit:
         logger.info("IR stream generator exit")
         pass
     except Exception as e:
-        logger.error(f"IR stream error: {e}")
+        logger.error("IR stream error: %s", e)
+    finally:
+        _edge_listeners.discard(listener)
+        _stop_edge_detect()
+        # The pin stays set up so other and later streams can keep reading it
+        logger.info("IR stream closed")
+
+async def ir_stream_async(fps=30):
+    """Async generator that yields the IR sensor value when it changes.
+    
+    Sleeps until the pin's next edge instead of polling, with at most fps
+    values per second, and repeats the current value every IR_KEEPALIVE
+    seconds while it doesn't change. Polls at fps if edge detection is
+    unavailable.
+    """
+    interval = 1.0 / fps
+    edge_triggered = _start_edge_detect()
+    logger.info("Starting async IR stream at up to %s FPS (%s)", fps, "edge triggered" if edge_triggered else "polling")
+    read = GPIO.input
+    edge = asyncio.Event()
+    listener = functools.partial(asyncio.get_running_loop().call_soon_threadsafe, edge.set)
+    if edge_triggered:
+        _edge_listeners.add(listener)
+    last = None
+    last_emit = 0.0
+    
+    try:
+        while True:
+            try:
+                value = read(IR_PIN)
+            except Exception as e:
+                logger.error("Error reading IR sensor: %s", e)
+                value = "error"
+            now = time.monotonic()
+            if value != last or now - last_emit >= IR_KEEPALIVE:
+                last = value
+                last_emit = now
+                yield value
+                # Rate limit (an edge meanwhile still sets the event)
+                await asyncio.sleep(interval)
+            elif not edge_triggered:
+                await asyncio.sleep(interval)
+            if edge_triggered:
+                try:
+                    await asyncio.wait_for(edge.wait(), timeout=max(0.0, last_emit + IR_KEEPALIVE - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass  # Keepalive
+                edge.clear()
+    finally:
+        _edge_listeners.discard(listener)
+        _stop_edge_detect()
+        # The pin stays set up so later streams can keep reading it
+        logger.info("Async IR stream closed")
+
+def _sample_batches(interval, free, ready, stop):
+    """Fill free batch buffers on fixed deadlines and queue them as ready.
+    
+    Runs on the dedicated sampler thread of ir_batches. A read error is
+    queued in place of a batch and ends sampling.
+    """
+    init_realtime_thread(IR_CPU, IR_RT_PRIORITY, "IR sampler")
+    read = GPIO.input
+    try:
+        read(IR_PIN)  # Warm-up read, keeping first-call costs out of the samples
+        # Samples are scheduled on absolute deadlines so the period doesn't
+        # drift by the time spent reading and handing over batches
+        deadline = time.monotonic()
+        while not stop.is_set():
+            try:
+                values, timestamps = item = free.get(timeout=0.1)
+            except queue.Empty:
+                continue  # Consumer still holds both buffers
+            # Restart the schedule rather than burst after waiting for a buffer
+            deadline = max(deadline, time.monotonic())
+            for i in range(len(values)):
+                _sleep_until(deadline)
+                values[i] = read(IR_PIN)
+                timestamps[i] = time.monotonic()
+                deadline += interval
+            ready.put(item)
+    except Exception as e:
+        logger.error("IR sampler error: %s", e)
+        ready.put(e)
+
+def ir_batches(fps=30, batch=16):
+    """Generator that samples the IR sensor at fps and yields batches.
+    
+    Each batch is a (values, timestamps) pair of memoryviews over batch
+    samples: values as unsigned bytes (0 or 1), timestamps as
+    time.monotonic() floats. Consumers process a whole batch per resume
+    instead of one sample. The buffers are reused: a batch is only valid
+    until the next one is requested, so copy it (e.g. bytes(values)) to
+    keep it.
+    
+    Sampling runs on a dedicated thread with a real-time policy on IR_CPU
+    (when permitted), so it isn't delayed by other processes, and the
+    thread iterating the generator keeps its own scheduling. Two buffers
+    alternate between the sampler and the consumer.
+    """
+    interval = 1.0 / fps
+    logger.info("Starting IR batches at %s FPS, %d samples per batch", fps, batch)
+    free = queue.SimpleQueue()
+    ready = queue.SimpleQueue()
+    for _ in range(2):
+        free.put((memoryview(array.array("B", bytes(batch))), memoryview(array.array("d", bytes(8 * batch)))))
+    stop = threading.Event()
+    sampler = threading.Thread(
+        target=_sample_batches,
+        args=(interval, free, ready, stop),
+        name="ir-sampler",
+        daemon=True
+    )
+    sampler.start()
+    
+    try:
+        while True:
+            item = ready.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+            free.put(item)  # The consumer is done with it
+    finally:
+        stop.set()
+        sampler.join(timeout=1.0)
+        logger.info("IR batches closed")
+
+def ir_edges(maxlen=4096):
+    """Generator that yields (tick, level) for each IR pin edge.
+    
+    Edges come from the pigpio daemon, which samples the GPIOs by DMA, so
+    tick is the edge's microsecond timestamp (pigpio tick, wrapping every
+    ~72 minutes) without Python callback jitter. Blocks while no edge is
+    pending; at most maxlen unread edges are kept, oldest dropped first.
+    Requires pigpio and a running pigpiod.
+    """
+    if pigpio is None:
+        raise RuntimeError("pigpio is not installed")
+    pi = pigpio.pi()
+    if not pi.connected:
+        raise RuntimeError("pigpio daemon not running")
+    
+    edges = collections.deque(maxlen=maxlen)
+    ready = threading.Event()
+    
+    def on_edge(gpio, level, tick):
+        edges.append((tick, level))
+        ready.set()
+    
+    callback = pi.callback(IR_PIN, pigpio.EITHER_EDGE, on_edge)
+    logger.info("Starting IR edge log on pigpio (up to %d pending edges)", maxlen)
+    try:
+        while True:
+            ready.wait()
+            ready.clear()
+            while edges:
+                yield edges.popleft()
     finally:
-        logger.info("Cleaning up IR GPIO")
-        GPIO.cleanup(IR_PIN)
+        callback.cancel()
+        pi.stop()
+        logger.info("IR edge log closed")
 
 def test_ir_sensor():
     """Test function to verify IR sensor is working"""
     try:
         logger.info("Testing IR sensor...")
+        deadline = time.monotonic()
         for i in range(20):
             value = GPIO.input(IR_PIN)
-            logger.info(f"Test {i+1}: IR Value = {value}")
-            time.sleep(0.5)
+            logger.info("Test %d: IR Value = %s", i + 1, value)
+            deadline += 0.5
+            _sleep_until(deadline)
         return True
     except Exception as e:
-        logger.error(f"IR sensor test failed: {e}")
+        logger.error("IR sensor test failed: %s", e)
         return False
\ No newline at end of file
@@ -0,0 +1,19 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def init_realtime_thread(cpu: int, priority: int, label: str):
+    """Pin the calling thread to a core and give it a SCHED_FIFO priority.
+    
+    Each step only logs a warning (naming the thread by label) when the
+    platform or the process's privileges don't allow it.
+    """
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except (AttributeError, OSError) as e:
+        logger.warning("Could not pin %s to CPU %d: %s", label, cpu, e)
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (AttributeError, OSError) as e:
+        logger.warning("Could not set SCHED_FIFO for %s: %s", label, e)
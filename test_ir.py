@@ -1,10 +1,8 @@
 import RPi.GPIO as GPIO
 import time
+from ir import IR_PIN  # Importing ir also sets the pin up as an input
 
 # Test IR sensor directly
-GPIO.setmode(GPIO.BCM)
-IR_PIN = 17
-GPIO.setup(IR_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
 
 try:
     print("Testing IR sensor directly...")